@@ -1,18 +1,62 @@
-from flask import Flask
-from flask_cors import CORS
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+import orjson
+from quart import Quart
+from quart.json.provider import DefaultJSONProvider
+from quart_cors import cors
 from .config import Config
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Uses orjson for (de)serialisation; unknown types go through the default hook."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+_log_listener = None
+
+def _configure_logging():
+    """Routes log records through a queue so request handlers never block on stdout."""
+    global _log_listener
+    if _log_listener is not None:
+        return
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    _log_listener = QueueListener(log_queue, handler)
+    _log_listener.start()
+    # Flush records still in the queue (e.g. a final traceback) on shutdown
+    atexit.register(_log_listener.stop)
+    logging.getLogger().addHandler(QueueHandler(log_queue))
+    # INFO for our own loggers only - httpx logs every Supabase URL (with
+    # emails in the query string) at INFO, so third parties stay at WARNING
+    logging.getLogger(__name__).setLevel(logging.INFO)
+
 def create_app():
-    app = Flask(__name__)
+    _configure_logging()
+    app = Quart(__name__)
     
     # Load Config
     app.config.from_object(Config)
     
+    # Faster JSON for the list-heavy endpoints (jsonify picks this up)
+    app.json = ORJSONProvider(app)
+    
     # Enable CORS (Crucial for React connection)
-    CORS(app)
+    app = cors(app)
     
     # Register the routes blueprint
-    from .routes import main
+    from .routes import main, load_college_data
     app.register_blueprint(main)
     
+    # Warm the Gemini knowledge base in the background so the first
+    # /api/ask-ai request doesn't wait for every document upload
+    if Config.GEMINI_API_KEY:
+        threading.Thread(target=load_college_data, daemon=True).start()
+    
     return app
\ No newline at end of file
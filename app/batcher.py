@@ -0,0 +1,69 @@
+import asyncio
+from postgrest.exceptions import APIError
+from .models import get_supabase
+
+class InsertBatcher:
+    """Coalesces concurrent single-row inserts into one multi-row insert per table.
+
+    Rows queued within `max_delay` seconds (or until `max_rows` are waiting)
+    are sent as a single `.insert([...])`. Each caller still awaits its own
+    row, so routes keep reporting success or failure as before.
+    """
+
+    def __init__(self, max_rows=50, max_delay=0.01):
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._pending = {}   # table -> [(row, future), ...]
+        self._timers = {}    # table -> scheduled flush
+        self._tasks = set()  # keeps running flushes referenced
+
+    async def submit(self, table, row):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(table, [])
+        pending.append((row, future))
+
+        if len(pending) >= self.max_rows:
+            self._schedule_flush(table)
+        elif table not in self._timers:
+            self._timers[table] = loop.call_later(self.max_delay, self._schedule_flush, table)
+
+        return await future
+
+    def _schedule_flush(self, table):
+        timer = self._timers.pop(table, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(table, [])
+        if batch:
+            task = asyncio.ensure_future(self._flush(table, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, table, batch):
+        try:
+            supabase = await get_supabase()
+            await supabase.table(table).insert([row for row, _ in batch]).execute()
+        except APIError as e:
+            if len(batch) == 1:
+                self._fail(batch, e)
+                return
+            # PostgREST rejected a row, so nothing was written - retry each row
+            # on its own so only the offending caller sees the error
+            await asyncio.gather(*(self._flush(table, [item]) for item in batch))
+        except Exception as e:
+            # Transport errors (timeouts, connection failures) may have committed
+            # the batch anyway, so retrying could insert duplicates - fail it whole
+            self._fail(batch, e)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+insert_batcher = InsertBatcher()
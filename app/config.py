@@ -6,4 +6,6 @@ load_dotenv()
 class Config:
     SUPABASE_URL = os.environ.get("SUPABASE_URL")
     SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-    GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
\ No newline at end of file
+    GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+    # Reject request bodies over 64 KB (Quart answers 413)
+    MAX_CONTENT_LENGTH = 64 * 1024
\ No newline at end of file
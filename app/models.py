@@ -1,8 +1,26 @@
-from supabase import create_client, Client
+import httpx
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
 from .config import Config
 
 # Initialize Supabase Client
 url: str = Config.SUPABASE_URL
 key: str = Config.SUPABASE_KEY
 
-supabase: Client = create_client(url, key)
\ No newline at end of file
+# Shared keep-alive connection pool, so DB calls reuse warm TCP/TLS
+# connections instead of opening a new one per request.
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    timeout=httpx.Timeout(10.0, connect=2.0),
+    headers={"Connection": "keep-alive"},
+)
+
+# The async client has to be created inside the running event loop,
+# so it is built on first use and shared afterwards.
+supabase: AsyncClient = None
+
+async def get_supabase() -> AsyncClient:
+    global supabase
+    if supabase is None:
+        supabase = await acreate_client(url, key, options=AsyncClientOptions(httpx_client=http_client))
+    return supabase
\ No newline at end of file
@@ -1,29 +1,327 @@
 import os
 import glob
-import google.generativeai as genai
-from flask import Blueprint, request, jsonify
-from .models import supabase
+import logging
+import json
+import hashlib
+import time
+import asyncio
+import threading
+import datetime
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cachetools import TTLCache
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: no cross-worker locking
+    fcntl = None
+from quart import Blueprint, Response, request, jsonify
+from .models import get_supabase
+from .batcher import insert_batcher
 from .config import Config
 
 main = Blueprint('main', __name__)
+logger = logging.getLogger(__name__)
+
+async def _json_body():
+    """Request JSON as a dict; missing, malformed or non-object bodies become {}."""
+    data = await request.get_json(silent=True, cache=True)
+    return data if isinstance(data, dict) else {}
+
+def _first(response):
+    """First row of a Supabase response, or None when there are no rows."""
+    return response.data[0] if response.data else None
+
+# --- COLUMNS RETURNED TO THE FRONTEND (keep in sync with the React views) ---
+STUDENT_PROFILE_COLUMNS = 'id, full_name, email, department, reg_id'
+FACULTY_PROFILE_COLUMNS = 'id, full_name, email, department, fid, phone'
+FACULTY_COMPLAINT_COLUMNS = 'id, status, created_at, description, students(full_name, reg_id)'
 
 # --- CONFIGURATION ---
-if Config.GEMINI_API_KEY:
-    genai.configure(api_key=Config.GEMINI_API_KEY)
+# google.generativeai pulls in gRPC/protobuf, so it is only imported
+# the first time an AI feature actually needs it.
+_genai = None
+
+def get_genai():
+    """Imports and configures the Gemini SDK on first use."""
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        if Config.GEMINI_API_KEY:
+            genai.configure(api_key=Config.GEMINI_API_KEY)
+        _genai = genai
+    return _genai
+
+MODEL_NAME = 'gemini-flash-latest'
+_model = None
+
+def get_model():
+    """Builds the Gemini model once and reuses it across requests."""
+    global _model
+    if _model is None:
+        _model = get_genai().GenerativeModel(MODEL_NAME)
+    return _model
+
+# --- STATIC PROMPT PREFIX ---
+_SYSTEM_PROMPT = (
+    "You are the official AI Assistant for RGUKT (Rajiv Gandhi University of Knowledge Technologies).",
+    "Use the provided files (PDFs, Images, Text) to answer the student's question accurately.",
+    "If the answer is found in the 'mess_menu' image, read the table row/column carefully.",
+    "If the answer is not in these documents, strictly say 'I don't have that information in my internal records.'",
+)
+_NO_DOCUMENTS_NOTE = "(No internal documents available. Answer using general knowledge if safe.)"
+
+# The prefix + documents are stored once in Gemini's context cache, so each
+# question only sends its own text. Best effort: if caching fails or the cache
+# is about to expire, ask_ai sends the full prompt instead.
+# All workers share one cache: its name is kept in PROMPT_CACHE_PATH and
+# created/extended under the same lock as the knowledge-base uploads.
+PROMPT_CACHE_TTL = datetime.timedelta(hours=1)
+PROMPT_CACHE_RETRY = 600  # seconds before retrying a failed cache creation
+PROMPT_CACHE_MARGIN = 120  # refresh/extend this many seconds before expiry
+PROMPT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '../.prompt_cache.json')
+_cached_model = None
+_cached_model_expires = 0.0  # wall-clock (time.time), comparable across workers
+_prompt_cache_next_refresh = 0.0
+_prompt_cache_unsupported = None  # documents signature Gemini refused to cache
+_prompt_cache_lock = threading.Lock()
+
+def _documents_signature(documents):
+    return hashlib.sha256("\n".join(sorted(d.name for d in documents)).encode()).hexdigest()
+
+def _shared_prompt_cache(caching, shared, signature):
+    """Returns the cache another worker created for the same documents, if it still exists."""
+    from google.api_core.exceptions import NotFound, PermissionDenied
+    if shared.get('documents') != signature or not shared.get('name'):
+        return None
+    try:
+        return caching.CachedContent.get(shared['name'])
+    except (NotFound, PermissionDenied):
+        return None
+
+def _cache_prompt_prefix():
+    """Creates, reuses or extends the shared context cache for the prompt prefix."""
+    global _cached_model, _cached_model_expires, _prompt_cache_next_refresh, _prompt_cache_unsupported
+    documents = knowledge_base
+    if not documents:
+        _prompt_cache_next_refresh = time.time() + PROMPT_CACHE_RETRY
+        return
+    signature = _documents_signature(documents)
+    if _prompt_cache_unsupported == signature:
+        _prompt_cache_next_refresh = float('inf')
+        return
+    if not _prompt_cache_lock.acquire(blocking=False):
+        return
+    try:
+        genai = get_genai()
+        from google.generativeai import caching
+        from google.api_core.exceptions import InvalidArgument, NotFound
+        unsupported = [MODEL_NAME, signature]
+        with _kb_files_lock():
+            shared = _read_json_file(PROMPT_CACHE_PATH)
+            if shared.get('unsupported') == unsupported:
+                _prompt_cache_unsupported = signature
+                _prompt_cache_next_refresh = float('inf')
+                return
+
+            now = time.time()
+            cache = _shared_prompt_cache(caching, shared, signature)
+            if cache is None:
+                try:
+                    cache = caching.CachedContent.create(
+                        model=MODEL_NAME,
+                        contents=[*_SYSTEM_PROMPT, *documents],
+                        ttl=PROMPT_CACHE_TTL
+                    )
+                except (InvalidArgument, NotFound) as e:
+                    # Model can't cache (or corpus too small): definitive, stop retrying
+                    _prompt_cache_unsupported = signature
+                    _prompt_cache_next_refresh = float('inf')
+                    _write_json_file(PROMPT_CACHE_PATH, {"unsupported": unsupported})
+                    logger.warning("⚠️ Context caching not supported, sending full prompt: %s", e)
+                    return
+                expires = now + PROMPT_CACHE_TTL.total_seconds()
+            elif cache.expire_time.timestamp() < now + PROMPT_CACHE_MARGIN:
+                cache.update(ttl=PROMPT_CACHE_TTL)
+                expires = now + PROMPT_CACHE_TTL.total_seconds()
+            else:
+                expires = cache.expire_time.timestamp()  # another worker keeps it fresh
+            _write_json_file(PROMPT_CACHE_PATH, {"name": cache.name, "documents": signature, "expires": expires})
+
+        _cached_model = genai.GenerativeModel.from_cached_content(cached_content=cache)
+        _cached_model_expires = expires
+        _prompt_cache_next_refresh = expires - PROMPT_CACHE_MARGIN
+        logger.info("🧠 Prompt prefix cached on Gemini (%s)", cache.name)
+    except Exception as e:
+        _prompt_cache_next_refresh = time.time() + PROMPT_CACHE_RETRY
+        logger.warning("⚠️ Context caching unavailable, sending full prompt: %s", e)
+    finally:
+        _prompt_cache_lock.release()
+
+def get_cached_model():
+    """Returns the context-cached model, refreshing it in the background when due."""
+    now = time.time()
+    if kb_ready.is_set() and now >= _prompt_cache_next_refresh and not _prompt_cache_lock.locked():
+        threading.Thread(target=_cache_prompt_prefix, daemon=True).start()
+    if _cached_model is not None and now < _cached_model_expires - 60:
+        return _cached_model
+    return None
 
 # --- GLOBAL STORAGE FOR UPLOADED FILES (AI MEMORY) ---
-# We store uploaded file references here so we don't re-upload them every time
-knowledge_base = []
+# We store uploaded file references here so we don't re-upload them every time.
+# Built privately by the loader, then published as a read-only tuple in one
+# reference swap, so request threads never see a half-filled list.
+knowledge_base = ()
+kb_version = 0  # bumped on every publish; part of the ask_ai answer-cache key
+
+# Set once load_college_data() has finished (successfully or not).
+# create_app() starts the upload in the background at startup.
+kb_ready = threading.Event()
+KB_WARMUP_WAIT = 5  # seconds ask_ai waits for an in-progress warmup
+KB_POLL_INTERVAL = 0.1
+KB_RELOAD_RETRY = 600  # seconds before ask_ai retries a warmup that left no documents
+_kb_load_lock = threading.Lock()
+_kb_next_reload = 0.0
+UPLOAD_WORKERS = 16
+
+# Gemini keeps uploaded files for ~48h, so handles are saved here and reused
+# after a restart. Entries are keyed by file path and checked against sha256.
+KB_CACHE_PATH = os.path.join(os.path.dirname(__file__), '../.kb_cache.json')
+# Held while a worker uploads/restores files, so with several hypercorn workers
+# only one uploads and the others then restore from its freshly written cache.
+KB_LOCK_PATH = os.path.join(os.path.dirname(__file__), '../.kb_cache.lock')
+
+# --- FACULTY EMAIL -> ID CACHE ---
+# The faculty roster rarely changes, so complaint submissions reuse recent lookups.
+# Unknown emails are remembered briefly so repeated typos don't hit the DB; that
+# TTL is short because a registration on another worker can't evict it here.
+_faculty_id_cache = TTLCache(maxsize=1024, ttl=300)
+_unknown_faculty_emails = TTLCache(maxsize=1024, ttl=30)
+
+def _forget_faculty(email=None, faculty_id=None):
+    """Drops cached lookups for an email and/or any email mapped to faculty_id."""
+    # Only strings can be cache keys; anything else was never cached
+    if isinstance(email, str):
+        _faculty_id_cache.pop(email, None)
+        _unknown_faculty_emails.pop(email, None)
+    if faculty_id is not None:
+        for cached_email, cached_id in list(_faculty_id_cache.items()):
+            if cached_id == faculty_id:
+                _faculty_id_cache.pop(cached_email, None)
+
+MAX_PAGE_SIZE = 100
+MAX_REPLY_LENGTH = 8192
+
+# --- PROFILE RESPONSE CACHE ---
+# Profiles are read on every dashboard load but rarely edited.
+# Keyed by ('student' | 'faculty', user_id); the PUT handlers evict their entry,
+# but only in their own worker. Another hypercorn worker may serve (or 304) the
+# old profile for up to PROFILE_CACHE_TTL seconds after a save, so keep it short.
+PROFILE_CACHE_TTL = 5
+_profile_cache = TTLCache(maxsize=10_000, ttl=PROFILE_CACHE_TTL)
+
+def _profile_response(profile):
+    """Returns the profile with an ETag, or an empty 304 if the client already has it."""
+    etag = hashlib.sha1(json.dumps(profile, sort_keys=True, default=str).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        return "", 304, {"ETag": f'"{etag}"'}
+    response = jsonify(profile)
+    response.set_etag(etag)
+    return response, 200
 
 def load_college_data():
+    """Uploads the college documents, then marks the knowledge base as ready."""
+    global _kb_next_reload
+    if not _kb_load_lock.acquire(blocking=False):
+        return  # another warmup is already running
+    try:
+        _upload_college_data()
+        _cache_prompt_prefix()
+    finally:
+        _kb_next_reload = time.monotonic() + KB_RELOAD_RETRY
+        _kb_load_lock.release()
+        kb_ready.set()
+
+async def wait_for_college_data(timeout):
+    """Waits up to timeout seconds for kb_ready by polling on the event loop.
+
+    Polling (instead of kb_ready.wait in a thread) keeps waiting requests from
+    tying up the default executor during the startup burst.
+    """
+    deadline = time.monotonic() + timeout
+    while not kb_ready.is_set() and time.monotonic() < deadline:
+        await asyncio.sleep(KB_POLL_INTERVAL)
+
+def reload_college_data_if_empty():
+    """Retries the warmup in the background when it left no documents (rate-limited)."""
+    if knowledge_base or not kb_ready.is_set() or _kb_load_lock.locked():
+        return
+    if time.monotonic() >= _kb_next_reload:
+        threading.Thread(target=load_college_data, daemon=True).start()
+
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+@contextlib.contextmanager
+def _kb_files_lock():
+    """Exclusive lock shared by all worker processes (no-op where fcntl is missing)."""
+    if fcntl is None:
+        yield
+        return
+    with open(KB_LOCK_PATH, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_json_file(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_json_file(path, data):
+    """Writes to a temp file and renames it over path, so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        logger.warning("⚠️ Could not save %s: %s", os.path.basename(path), e)
+
+def _restore_or_upload(genai, file_path, cached):
+    """Reuses a still-ACTIVE Gemini file with matching sha256, else uploads it."""
+    sha = _file_sha256(file_path)
+    if cached and cached.get('sha') == sha:
+        from google.api_core.exceptions import NotFound, PermissionDenied
+        try:
+            existing = genai.get_file(cached['name'])
+            if existing.state.name == 'ACTIVE':
+                return existing, sha, True
+        except (NotFound, PermissionDenied):
+            pass  # expired or deleted on Google's side - upload again
+        # Any other error (network, quota) propagates: the file counts as failed
+        # for this run and its cached handle is kept for the next one
+    return genai.upload_file(file_path), sha, False
+
+def _upload_college_data():
     """Scans the 'documents/college_data' folder and uploads files to Gemini."""
-    global knowledge_base
+    global knowledge_base, kb_version
     
     # If we already loaded data, skip re-uploading to save time/bandwidth
-    if len(knowledge_base) > 0:
+    if knowledge_base:
         return
 
-    print("📂 Scanning 'college_data' folder...")
+    logger.info("📂 Scanning 'college_data' folder...")
     
     # 1. Define path to your documents
     # Assumes your folder is at: server/documents/college_data
@@ -34,85 +332,172 @@ def load_college_data():
     files_to_upload = []
     
     if not os.path.exists(folder_path):
-        print(f"❌ Error: Folder not found at {folder_path}")
-        print("   Please create 'server/documents/college_data' and put your files there.")
+        logger.error("❌ Folder not found at %s - create it and put the college documents there.", folder_path)
         return
 
     for ext in extensions:
         files_to_upload.extend(glob.glob(os.path.join(folder_path, ext)))
 
     if not files_to_upload:
-        print("⚠️ No files found in college_data folder.")
+        logger.warning("⚠️ No files found in college_data folder.")
         return
 
-    print(f"found {len(files_to_upload)} files. Uploading to Gemini (this may take a minute)...")
-
-    # 3. Upload files to Google
-    for file_path in files_to_upload:
-        try:
-            uploaded_file = genai.upload_file(file_path)
-            knowledge_base.append(uploaded_file)
-            print(f"   ✅ Uploaded: {os.path.basename(file_path)}")
-        except Exception as e:
-            print(f"   ❌ Failed: {os.path.basename(file_path)} - {e}")
-
-    print(f"🚀 Knowledge Base Ready! ({len(knowledge_base)} documents loaded)")
+    logger.info("Found %d files. Uploading to Gemini (this may take a minute)...", len(files_to_upload))
+    genai = get_genai()
+
+    # 3. Upload files to Google (in parallel - each upload is an independent HTTPS POST)
+    #    Files unchanged since the last run are restored from KB_CACHE_PATH instead
+    with _kb_files_lock():
+        documents = _restore_or_upload_all(genai, files_to_upload)
+    knowledge_base = tuple(documents)
+    kb_version += 1
+
+    logger.info("🚀 Knowledge Base Ready! (%d documents loaded)", len(knowledge_base))
+
+def _restore_or_upload_all(genai, files_to_upload):
+    """Restores or uploads every file and records the handles in KB_CACHE_PATH."""
+    kb_cache = _read_json_file(KB_CACHE_PATH)
+    new_cache = {}
+    documents = []
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        futures = {
+            executor.submit(_restore_or_upload, genai, path, kb_cache.get(path)): path
+            for path in files_to_upload
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                uploaded_file, sha, reused = future.result()
+                documents.append(uploaded_file)
+                new_cache[file_path] = {
+                    "name": uploaded_file.name,
+                    "uri": uploaded_file.uri,
+                    "mime_type": uploaded_file.mime_type,
+                    "sha": sha
+                }
+                logger.info("   %s: %s", "♻️ Reused" if reused else "✅ Uploaded", os.path.basename(file_path))
+            except Exception as e:
+                logger.error("   ❌ Failed: %s - %s", os.path.basename(file_path), e)
+                if file_path in kb_cache:
+                    new_cache[file_path] = kb_cache[file_path]
+
+    # Don't let a run where every upload failed wipe the handles of the last good run
+    if documents:
+        _write_json_file(KB_CACHE_PATH, new_cache)
+    return documents
 
 
 # --- 1. ROOT CHECK ---
 @main.route('/')
-def home():
+async def home():
     return "✅ Backend server is running! The API is ready."
 
 # --- 2. ASK GEMINI (RAG / FILE SEARCH) ---
 @main.route('/api/ask-ai', methods=['POST'])
-def ask_ai():
-    data = request.json
+async def ask_ai():
+    data = await _json_body()
     question = data.get('question')
-    print(f"📝 User asked: {question}")
+    if not isinstance(question, str) or not question.strip():
+        return jsonify({"error": "question is required"}), 400
+    logger.info("📝 User asked: %s", question, extra={"question": question})
 
     try:
         # Check API Key
         if not Config.GEMINI_API_KEY:
             return jsonify({"error": "Gemini API Key missing"}), 500
 
-        # 1. Ensure data is loaded (Lazy Loading)
-        if not knowledge_base:
-            load_college_data()
+        # 1. Give the startup warmup a moment; answer without files if it is still running
+        if not kb_ready.is_set():
+            await wait_for_college_data(KB_WARMUP_WAIT)
+        reload_college_data_if_empty()
             
-        # 2. Configure Model (Use Flash for large context)
-        # Use the model name you confirmed earlier (e.g., 'gemini-1.5-flash' or 'gemini-flash-latest')
-        model = genai.GenerativeModel('gemini-flash-latest')
-        # 3. Create the Prompt with Files
-        chat_content = [
-            "You are the official AI Assistant for RGUKT (Rajiv Gandhi University of Knowledge Technologies).",
-            "Use the provided files (PDFs, Images, Text) to answer the student's question accurately.",
-            "If the answer is found in the 'mess_menu' image, read the table row/column carefully.",
-            "If the answer is not in these documents, strictly say 'I don't have that information in my internal records.'",
-            "Question: " + question
-        ]
-        
-        # Attach the uploaded files to the prompt
-        if knowledge_base:
-            chat_content.extend(knowledge_base)
+        # 2. Configure Model + Prompt
+        #    With a live context cache only the question is sent; otherwise the
+        #    full prefix and the uploaded files go with every request
+        cached_model = get_cached_model()
+        if cached_model is not None:
+            model = cached_model
+            chat_content = ["Question: " + question]
         else:
-            chat_content.append("(No internal documents available. Answer using general knowledge if safe.)")
-
-        # 4. Generate Response
-        response = model.generate_content(chat_content)
-        
-        print("✅ Gemini replied successfully")
-        return jsonify({"answer": response.text})
+            model = get_model()
+            chat_content = [*_SYSTEM_PROMPT, "Question: " + question]
+            documents = knowledge_base
+            if documents:
+                chat_content.extend(documents)
+            else:
+                chat_content.append(_NO_DOCUMENTS_NOTE)
+
+        # 3. Generate Response
+        #    Clients sending 'Accept: text/event-stream' get the answer chunk by chunk
+        if request.accept_mimetypes.best == 'text/event-stream':
+            return Response(_stream_answer(model, chat_content), mimetype='text/event-stream')
+
+        # Answers given without documents are not cached - a reload may fix them
+        answer = await _coalesced_answer(question, model, chat_content, cacheable=bool(knowledge_base))
+        return jsonify({"answer": answer})
         
     except Exception as e:
-        print(f"🔥 CRASH ERROR: {str(e)}")
+        logger.exception("🔥 ask_ai failed: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
+# --- ANSWER CACHE + IN-FLIGHT COALESCING ---
+# Identical questions (after normalising case/whitespace) share one Gemini call:
+# later askers await the first asker's task, and answers are reused for 5 minutes.
+_answer_cache = TTLCache(maxsize=500, ttl=300)
+_inflight_answers = {}
+
+def _question_key(question):
+    normalized = " ".join(question.lower().split())
+    return hashlib.sha256(f"{kb_version}:{normalized}".encode()).hexdigest()
+
+async def _generate_answer(model, chat_content):
+    response = await model.generate_content_async(chat_content)
+    logger.info("✅ Gemini replied successfully")
+    return response.text
+
+def _finish_answer(key, task, cacheable):
+    _inflight_answers.pop(key, None)
+    if cacheable and not task.cancelled() and task.exception() is None:
+        _answer_cache[key] = task.result()
+
+async def _coalesced_answer(question, model, chat_content, cacheable=True):
+    """Returns a cached answer, joins an identical in-flight request, or asks Gemini."""
+    key = _question_key(question)
+    answer = _answer_cache.get(key)
+    if answer is not None:
+        return answer
+
+    task = _inflight_answers.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_answer(model, chat_content))
+        _inflight_answers[key] = task
+        task.add_done_callback(lambda t: _finish_answer(key, t, cacheable))
+    # shield: one caller disconnecting must not cancel the answer for the others
+    return await asyncio.shield(task)
+
+def _sse(payload, event=None):
+    """Encodes one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n".encode()
+
+async def _stream_answer(model, chat_content):
+    """Yields Gemini's answer as SSE 'data' chunks, then a 'done' (or 'error') event."""
+    try:
+        response = await model.generate_content_async(chat_content, stream=True)
+        async for chunk in response:
+            yield _sse({"chunk": chunk.text})
+        logger.info("✅ Gemini streamed reply successfully")
+        yield _sse({}, event="done")
+    except Exception as e:
+        logger.exception("🔥 ask_ai stream failed: %s", e)
+        yield _sse({"error": str(e)}, event="error")
+
+
 # --- 3. REGISTER STUDENT (Updated for reg_id) ---
 @main.route('/api/register-student', methods=['POST'])
-def register_student():
-    data = request.json
+async def register_student():
+    data = await _json_body()
     try:
         student_data = {
             "id": data.get('id'),         # Auth UUID
@@ -122,24 +507,33 @@ def register_student():
             # MAP THE FRONTEND ID TO YOUR NEW DATABASE COLUMN
             "reg_id": data.get('student_reg_no') 
         }
-        supabase.table('students').insert(student_data).execute()
+        await insert_batcher.submit('students', student_data)
         return jsonify({"message": "Student created successfully!"}), 201
     except Exception as e:
-        print(f"Error registering student: {e}")
+        logger.error("Error registering student: %s", e)
         return jsonify({"error": str(e)}), 500
 
 # --- 4. SUBMIT COMPLAINT ---
 @main.route('/api/submit-complaint', methods=['POST'])
-def submit_complaint():
-    data = request.json
+async def submit_complaint():
+    supabase = await get_supabase()
+    data = await _json_body()
     faculty_email = data.get('faculty_email')
+    if not isinstance(faculty_email, str):
+        return jsonify({"error": "faculty_email must be a string."}), 400
     
-    # Check Faculty
-    faculty_response = supabase.table('faculty').select('id').eq('email', faculty_email).execute()
-    if not faculty_response.data:
+    # Check Faculty (cached)
+    faculty_id = _faculty_id_cache.get(faculty_email)
+    if faculty_id is None and faculty_email not in _unknown_faculty_emails:
+        faculty_response = await supabase.table('faculty').select('id').eq('email', faculty_email).execute()
+        faculty = _first(faculty_response)
+        if faculty:
+            faculty_id = _faculty_id_cache[faculty_email] = faculty['id']
+        else:
+            _unknown_faculty_emails[faculty_email] = True
+
+    if faculty_id is None:
         return jsonify({"error": f"Faculty with email '{faculty_email}' not found."}), 404
-        
-    faculty_id = faculty_response.data[0]['id']
 
     complaint_data = {
         "student_id": data.get('student_id'),
@@ -150,20 +544,21 @@ def submit_complaint():
     }
     
     try:
-        supabase.table('complaints').insert(complaint_data).execute()
+        await insert_batcher.submit('complaints', complaint_data)
         return jsonify({"message": "Complaint sent!"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # --- 5. GET STUDENT HISTORY (Updated to show Faculty Name) ---
 @main.route('/api/my-complaints/<student_id>', methods=['GET'])
-def get_my_complaints(student_id):
+async def get_my_complaints(student_id):
+    supabase = await get_supabase()
     try:
         # NESTED JOIN QUERY:
         # 1. Fetch Complaint
         # 2. Fetch Response details
         # 3. Inside Response, Fetch Faculty Name
-        response = supabase.table('complaints')\
+        response = await supabase.table('complaints')\
             .select('description, status, created_at, complaint_responses(response_message, faculty(full_name))')\
             .eq('student_id', student_id)\
             .order('created_at', desc=True)\
@@ -175,7 +570,7 @@ def get_my_complaints(student_id):
             responder_name = "" # Default empty
             
             # Check if we have a response
-            if item.get('complaint_responses') and len(item['complaint_responses']) > 0:
+            if item.get('complaint_responses'):
                 resp_obj = item['complaint_responses'][0]
                 answer_text = resp_obj['response_message']
                 
@@ -193,13 +588,13 @@ def get_my_complaints(student_id):
             
         return jsonify(formatted_data), 200
     except Exception as e:
-        print(f"Error fetching history: {e}")
+        logger.error("Error fetching history: %s", e)
         return jsonify({"error": str(e)}), 500
 
 # --- 6. REGISTER FACULTY (Enabled FID & Phone) ---
 @main.route('/api/register-faculty', methods=['POST'])
-def register_faculty():
-    data = request.json
+async def register_faculty():
+    data = await _json_body()
     try:
         faculty_data = {
             "id": data.get('id'),
@@ -210,51 +605,57 @@ def register_faculty():
             "fid": data.get('fid'),  
             "phone": data.get('phone') 
         }
-        supabase.table('faculty').insert(faculty_data).execute()
+        await insert_batcher.submit('faculty', faculty_data)
+        _forget_faculty(faculty_data['email'])
         return jsonify({"message": "Faculty profile created!"}), 201
     except Exception as e:
-        print(f"Error registering faculty: {e}")
+        logger.error("Error registering faculty: %s", e)
         return jsonify({"error": str(e)}), 500
 
 # ...
 
 # --- 7. GET FACULTY COMPLAINTS (Now fetching 'reg_id') ---
 @main.route('/api/faculty/complaints/<faculty_id>', methods=['GET'])
-def get_faculty_complaints(faculty_id):
+async def get_faculty_complaints(faculty_id):
+    supabase = await get_supabase()
     try:
         # CHANGE: We request 'reg_id' inside the students() join
-        response = supabase.table('complaints')\
-            .select('*, students(full_name, reg_id)')\
+        query = supabase.table('complaints')\
+            .select(FACULTY_COMPLAINT_COLUMNS)\
             .eq('faculty_id', faculty_id)\
-            .order('created_at', desc=True)\
-            .execute()
-            
+            .order('created_at', desc=True)
+
+        # Optional pagination: ?page=0&page_size=20 (whole list when 'page' is omitted)
+        page = request.args.get('page', type=int)
+        if page is not None:
+            page_size = min(max(request.args.get('page_size', 20, type=int), 1), MAX_PAGE_SIZE)
+            page = max(page, 0)
+            query = query.range(page * page_size, (page + 1) * page_size - 1)
+
+        response = await query.execute()
         return jsonify(response.data), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # --- 8. SEND FACULTY REPLY ---
 @main.route('/api/faculty/reply', methods=['POST'])
-def faculty_reply():
-    data = request.json
+async def faculty_reply():
+    supabase = await get_supabase()
+    data = await _json_body()
     complaint_id = data.get('complaint_id')
     faculty_id = data.get('faculty_id')
     message = data.get('response_message')
 
-    try:
-        # Save response
-        response_data = {
-            "complaint_id": complaint_id,
-            "faculty_id": faculty_id,
-            "response_message": message
-        }
-        supabase.table('complaint_responses').insert(response_data).execute()
+    if not isinstance(message, str) or not message or len(message) > MAX_REPLY_LENGTH:
+        return jsonify({"error": f"response_message must be 1-{MAX_REPLY_LENGTH} characters."}), 400
 
-        # Update status
-        supabase.table('complaints')\
-            .update({"status": "Resolved"})\
-            .eq('id', complaint_id)\
-            .execute()
+    try:
+        # Save response + mark Resolved atomically (see supabase/migrations)
+        await supabase.rpc('faculty_reply', {
+            "p_complaint_id": complaint_id,
+            "p_faculty_id": faculty_id,
+            "p_message": message
+        }).execute()
 
         return jsonify({"message": "Reply sent!"}), 201
     except Exception as e:
@@ -262,45 +663,62 @@ def faculty_reply():
 
 # --- 9. GET STUDENT PROFILE ---
 @main.route('/api/student/profile/<user_id>', methods=['GET'])
-def get_student_profile(user_id):
+async def get_student_profile(user_id):
+    supabase = await get_supabase()
     try:
-        response = supabase.table('students').select('*').eq('id', user_id).execute()
-        if response.data:
-            return jsonify(response.data[0]), 200
+        profile = _profile_cache.get(('student', user_id))
+        if profile:
+            return _profile_response(profile)
+
+        response = await supabase.table('students').select(STUDENT_PROFILE_COLUMNS).eq('id', user_id).execute()
+        profile = _first(response)
+        if profile:
+            _profile_cache[('student', user_id)] = profile
+            return _profile_response(profile)
         return jsonify({"error": "Profile not found"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # --- 10. GET FACULTY PROFILE ---
 @main.route('/api/faculty/profile/<user_id>', methods=['GET'])
-def get_faculty_profile(user_id):
+async def get_faculty_profile(user_id):
+    supabase = await get_supabase()
     try:
-        response = supabase.table('faculty').select('*').eq('id', user_id).execute()
-        if response.data:
-            return jsonify(response.data[0]), 200
+        profile = _profile_cache.get(('faculty', user_id))
+        if profile:
+            return _profile_response(profile)
+
+        response = await supabase.table('faculty').select(FACULTY_PROFILE_COLUMNS).eq('id', user_id).execute()
+        profile = _first(response)
+        if profile:
+            _profile_cache[('faculty', user_id)] = profile
+            return _profile_response(profile)
         return jsonify({"error": "Profile not found"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # --- 11. UPDATE STUDENT PROFILE ---
 @main.route('/api/student/profile/<user_id>', methods=['PUT'])
-def update_student_profile(user_id):
-    data = request.json
+async def update_student_profile(user_id):
+    supabase = await get_supabase()
+    data = await _json_body()
     try:
         update_data = {
             "full_name": data.get('name'),
             "email": data.get('email'),
             "department": data.get('department')
         }
-        supabase.table('students').update(update_data).eq('id', user_id).execute()
+        await supabase.table('students').update(update_data).eq('id', user_id).execute()
+        _profile_cache.pop(('student', user_id), None)
         return jsonify({"message": "Updated!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # --- 12. UPDATE FACULTY PROFILE (Ensure Phone is here) ---
 @main.route('/api/faculty/profile/<user_id>', methods=['PUT'])
-def update_faculty_profile(user_id):
-    data = request.json
+async def update_faculty_profile(user_id):
+    supabase = await get_supabase()
+    data = await _json_body()
     try:
         update_data = {
             "full_name": data.get('name'),
@@ -308,7 +726,9 @@ def update_faculty_profile(user_id):
             "department": data.get('department'),
             "phone": data.get('phone') # This allows you to update phone via "Edit Profile"
         }
-        supabase.table('faculty').update(update_data).eq('id', user_id).execute()
+        await supabase.table('faculty').update(update_data).eq('id', user_id).execute()
+        _forget_faculty(update_data['email'], faculty_id=user_id)
+        _profile_cache.pop(('faculty', user_id), None)
         return jsonify({"message": "Updated!"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -2,5 +2,6 @@ from app import create_app
 
 app = create_app()
 
+# Production: hypercorn "app:create_app()" --workers 4
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,18 @@
+-- Saves a faculty reply and resolves the complaint in one transaction,
+-- so /api/faculty/reply needs a single round-trip.
+create or replace function faculty_reply(
+    p_complaint_id uuid,
+    p_faculty_id uuid,
+    p_message text
+) returns void
+language plpgsql
+as $$
+begin
+    insert into complaint_responses (complaint_id, faculty_id, response_message)
+    values (p_complaint_id, p_faculty_id, p_message);
+
+    update complaints
+    set status = 'Resolved'
+    where id = p_complaint_id;
+end;
+$$;
@@ -0,0 +1,16 @@
+-- Indexes for the hot filters in app/routes.py.
+-- Plain (non-concurrent) builds so this runs inside the migration transaction;
+-- the tables are small enough that the brief write lock is not a concern.
+-- Check the plans with EXPLAIN ANALYZE after applying.
+
+-- get_faculty_complaints: .eq('faculty_id', ...).order('created_at', desc=True)
+create index if not exists complaints_faculty_id_created_at_idx
+    on complaints (faculty_id, created_at desc);
+
+-- get_my_complaints: .eq('student_id', ...).order('created_at', desc=True)
+create index if not exists complaints_student_id_created_at_idx
+    on complaints (student_id, created_at desc);
+
+-- submit_complaint: faculty lookup by .eq('email', ...)
+create unique index if not exists faculty_email_idx
+    on faculty (email);